@@ -1,18 +1,103 @@
 """
 This module downloads a pretrained music genre classification model.
 Once downloaded, the model can be reused locally to perform inferences.
-This module includes functions to download or load the model, make inferences 
+This module includes functions to download or load the model, make inferences
 with the model, and parse the inference result and output the model's prediction.
+
+Heavy libraries (transformers, pydub) are imported lazily. At startup a background
+thread loads the model from the local "model" snapshot, runs one warm-up inference on
+a bundled clip and records how long each startup phase took. The /ready endpoint
+reports these timings along with the time-to-ready target.
 """
 
+import time
+
+# Fallback start time, taken before any third-party import
+_START_TIME = time.perf_counter()
+
+# pylint: disable=wrong-import-position
 import base64
+import os
+import threading
+
 # from pymongo import MongoClient
-from transformers import pipeline
 from flask import Flask, request, jsonify
-from pydub import AudioSegment
 
 app = Flask(__name__)
 
+MODEL_NAME = "leo-kwan/wav2vec2-base-100k-gtzan-music-genres-finetuned-gtzan"
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+WARMUP_CLIP = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "3_symphony_short.mp3"
+)
+# Target time from process start until the first request can be served.
+TIME_TO_READY_TARGET = float(os.getenv("TIME_TO_READY_TARGET", "30"))
+
+_model_lock = threading.Lock()
+_model_cache = {}
+_ready = threading.Event()
+_startup_lock = threading.Lock()
+startup_timings = {}
+startup_state = {"error": None}
+
+
+def process_uptime():
+    """
+    Seconds since this process was created, including interpreter start-up and
+    imports. Read from /proc on Linux; elsewhere falls back to the time since
+    this module started importing.
+
+    Returns:
+        uptime (float): Seconds since process start.
+    """
+    try:
+        with open("/proc/self/stat", "r", encoding="utf-8") as f:
+            # Fields after the command name; starttime is field 22 of the file
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r", encoding="utf-8") as f:
+            system_uptime = float(f.read().split()[0])
+        return system_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _START_TIME
+
+
+def record_timing(phase, seconds):
+    """
+    Record how long a startup phase took. Safe to call from the warm-up thread
+    while /ready is being served.
+
+    Args:
+        phase (str): Name of the startup phase.
+        seconds (float): Duration of the phase in seconds.
+
+    Returns:
+        None
+    """
+    with _startup_lock:
+        startup_timings[phase] = seconds
+
+
+def get_startup_status():
+    """
+    Snapshot of the warm-up progress for the /ready endpoint.
+
+    Returns:
+        status: A dictionary with the readiness flag, a copy of the phase timings,
+        the time-to-ready target, whether it was met and any warm-up error.
+    """
+    with _startup_lock:
+        timings = dict(startup_timings)
+        error = startup_state["error"]
+    return {
+        "ready": _ready.is_set(),
+        "timings": timings,
+        "time_to_ready_target": TIME_TO_READY_TARGET,
+        "within_target": timings.get("time_to_ready", float("inf"))
+        <= TIME_TO_READY_TARGET,
+        "error": error,
+    }
+
+
 def download_model():
     """
     Download model from online. The model data will be stored in a
@@ -21,11 +106,39 @@ def download_model():
     Returns:
         None
     """
-    pipe = pipeline(
-        "audio-classification",
-        model="leo-kwan/wav2vec2-base-100k-gtzan-music-genres-finetuned-gtzan",
-    )
-    pipe.save_pretrained("model")
+    from transformers import pipeline  # pylint: disable=import-outside-toplevel
+
+    pipe = pipeline("audio-classification", model=MODEL_NAME)
+    pipe.save_pretrained(MODEL_DIR)
+
+
+def load_model():
+    """
+    Load the model from the local "model" snapshot, downloading it first only if
+    no snapshot exists. The loaded pipeline is cached so later calls are free.
+
+    Returns:
+        pipe: The audio classification pipeline.
+    """
+    with _model_lock:
+        if "pipe" in _model_cache:
+            return _model_cache["pipe"]
+
+        phase_start = time.perf_counter()
+        from transformers import pipeline  # pylint: disable=import-outside-toplevel
+
+        record_timing("import_transformers", time.perf_counter() - phase_start)
+
+        if not os.path.isdir(MODEL_DIR):
+            phase_start = time.perf_counter()
+            download_model()
+            record_timing("download_model", time.perf_counter() - phase_start)
+
+        phase_start = time.perf_counter()
+        pipe = pipeline("audio-classification", model=MODEL_DIR)
+        record_timing("load_model", time.perf_counter() - phase_start)
+        _model_cache["pipe"] = pipe
+        return pipe
 
 
 def inference(audio_file):
@@ -38,11 +151,61 @@ def inference(audio_file):
     Returns:
         result: An array of dictionaries, each of which contains a label field and a score field.
     """
-    pipe = pipeline("audio-classification", model="model")
+    pipe = load_model()
     result = pipe(audio_file)
     return result
 
 
+def warm_up():
+    """
+    Load the model and run one inference on the bundled clip so the first real
+    request does not pay for imports, model loading or lazy initialisation.
+    Timings of each phase are recorded in startup_timings. If warm-up fails the
+    error is recorded in startup_state and the service is never marked ready.
+
+    Returns:
+        None
+    """
+    try:
+        load_model()
+        phase_start = time.perf_counter()
+        import pydub  # pylint: disable=import-outside-toplevel,unused-import
+
+        record_timing("import_pydub", time.perf_counter() - phase_start)
+        if os.path.isfile(WARMUP_CLIP):
+            phase_start = time.perf_counter()
+            inference(WARMUP_CLIP)
+            record_timing("warmup_inference", time.perf_counter() - phase_start)
+        else:
+            print(f"Warm-up clip {WARMUP_CLIP} not found, skipping warm-up inference")
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        message = f"{type(error).__name__}: {error}"
+        with _startup_lock:
+            startup_state["error"] = message
+        print(f"Model warm-up failed: {message}")
+        return
+    record_timing("time_to_ready", process_uptime())
+    _ready.set()
+    status = get_startup_status()
+    print(
+        f"Model ready in {status['timings']['time_to_ready']:.2f}s "
+        f"(target {TIME_TO_READY_TARGET:.0f}s): {status['timings']}"
+    )
+
+
+def start_warm_up():
+    """
+    Start warm_up() in a daemon thread so the server can accept connections
+    while the model is loading.
+
+    Returns:
+        thread: The started warm-up thread.
+    """
+    thread = threading.Thread(target=warm_up, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
 def parse_result(result):
     """
     Parse the result returned by inference() to get the top 1 prediction from the model.
@@ -64,15 +227,16 @@ def parse_result(result):
 
 def predict(audio_data):
     """
-    Main function to download or load the model, make an inference, and parse and return the result.
+    Main function to load the model, make an inference, and parse and return the result.
 
     Args:
         audio_data (str): raw audio data.
-        
+
     Returns:
         pred: prediction of the model.
     """
-    download_model()
+    from pydub import AudioSegment  # pylint: disable=import-outside-toplevel
+
     sample_width = 2
     channels = 1
     padding = len(audio_data) % (sample_width * channels)
@@ -96,11 +260,25 @@ def predict(audio_data):
 
 # main("3_symphony_short.mp3")
 
+@app.route("/ready", methods=["GET"])
+def ready_api():
+    """
+    Readiness probe. Returns 200 once the model has been warmed up and 503 before,
+    together with the startup phase timings, the time-to-ready target, whether
+    it was met and any warm-up error.
+
+    Returns:
+        result: readiness status and startup timings.
+    """
+    status = get_startup_status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 @app.route("/classify", methods=["POST"])
 def classify_api():
     """
     ML API that classifies the music.
-    
+
     Returns:
         result: classification result.
     """
@@ -113,4 +291,5 @@ def classify_api():
 
 
 if __name__ == "__main__":
+    start_warm_up()
     app.run(host="0.0.0.0", port=5001)
@@ -0,0 +1,149 @@
+"""
+Unit Tests for the Flask-based machine learning client in `app.py`.
+
+This module tests the model loading and startup path without the real model:
+- Caching of the loaded pipeline and downloading only when no local snapshot exists.
+- Warm-up timings and error reporting.
+- The /ready endpoint before and after warm-up.
+
+Author:
+- Thomas Chen, An Hai, Annabella Lee, Edison Wang
+"""
+
+# pylint: disable=redefined-outer-name
+import sys
+import types
+from unittest.mock import patch, MagicMock
+import pytest
+import app
+
+
+@pytest.fixture
+def mock_pipeline():
+    """
+    Replace `transformers.pipeline` with a mock and reset the startup state of the app.
+    """
+    pipeline = MagicMock()
+    pipeline.return_value.return_value = [{"label": "classical", "score": 0.9}]
+    fake_transformers = types.ModuleType("transformers")
+    fake_transformers.pipeline = pipeline
+    fake_pydub = types.ModuleType("pydub")
+    with patch.dict(
+        sys.modules, {"transformers": fake_transformers, "pydub": fake_pydub}
+    ):
+        app._model_cache.clear()  # pylint: disable=protected-access
+        app.startup_timings.clear()
+        app.startup_state["error"] = None
+        app._ready.clear()  # pylint: disable=protected-access
+        yield pipeline
+        app._model_cache.clear()  # pylint: disable=protected-access
+
+
+@pytest.fixture
+def flask_client():
+    """
+    Provide a Flask test client for testing application routes.
+    """
+    app.app.config["TESTING"] = True
+    with app.app.test_client() as client:
+        yield client
+
+
+@patch("app.download_model")
+@patch("app.os.path.isdir", return_value=True)
+def test_load_model_cached(_mock_isdir, mock_download_model, mock_pipeline):
+    """
+    Test that `load_model` builds the pipeline from the local snapshot only once.
+    """
+    first = app.load_model()
+    second = app.load_model()
+
+    assert first is second
+    mock_pipeline.assert_called_once_with("audio-classification", model=app.MODEL_DIR)
+    mock_download_model.assert_not_called()
+    assert "download_model" not in app.startup_timings
+
+
+@patch("app.download_model")
+@patch("app.os.path.isdir", return_value=False)
+def test_load_model_downloads_when_missing(
+    _mock_isdir, mock_download_model, mock_pipeline
+):
+    """
+    Test that `load_model` downloads the model when no local snapshot exists.
+    """
+    app.load_model()
+
+    mock_download_model.assert_called_once()
+    mock_pipeline.assert_called_once_with("audio-classification", model=app.MODEL_DIR)
+    assert "download_model" in app.startup_timings
+
+
+@patch("app.os.path.isdir", return_value=True)
+def test_ready_before_and_after_warm_up(_mock_isdir, mock_pipeline, flask_client):
+    """
+    Test that /ready returns 503 before warm-up and 200 with timings afterwards.
+    """
+    response = flask_client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["ready"] is False
+    assert response.get_json()["within_target"] is False
+
+    app.warm_up()
+
+    response = flask_client.get("/ready")
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data["ready"] is True
+    assert data["error"] is None
+    assert data["within_target"] is True
+    assert "warmup_inference" in data["timings"]
+    assert "time_to_ready" in data["timings"]
+    mock_pipeline.return_value.assert_called_once_with(app.WARMUP_CLIP)
+
+
+@patch("app.os.path.isfile", return_value=False)
+@patch("app.os.path.isdir", return_value=True)
+def test_warm_up_without_clip(_mock_isdir, _mock_isfile, mock_pipeline):
+    """
+    Test that a missing warm-up clip skips the inference without recording its timing.
+    """
+    app.warm_up()
+
+    assert app._ready.is_set()  # pylint: disable=protected-access
+    assert "warmup_inference" not in app.startup_timings
+    mock_pipeline.return_value.assert_not_called()
+
+
+@patch("app.os.path.isdir", return_value=True)
+def test_warm_up_failure_reported(_mock_isdir, mock_pipeline, flask_client):
+    """
+    Test that a failing warm-up is reported by /ready instead of staying silent.
+    """
+    mock_pipeline.side_effect = OSError("model files missing")
+
+    app.warm_up()
+
+    response = flask_client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "OSError: model files missing"
+
+
+def test_process_uptime_from_proc():
+    """
+    Test that `process_uptime` measures from process creation, which includes
+    interpreter start-up and imports done before `app` was loaded.
+    """
+    assert app.process_uptime() >= 0
+
+
+@patch("builtins.open", side_effect=OSError("no /proc"))
+def test_process_uptime_fallback(_mock_open):
+    """
+    Test that `process_uptime` falls back to the time since import without /proc.
+    """
+    uptime = app.process_uptime()
+    started = app._START_TIME  # pylint: disable=protected-access
+    since_import = app.time.perf_counter() - started
+
+    assert 0 <= uptime <= since_import
@@ -19,11 +19,13 @@ import os
 import secrets
 import ast
 import base64
+from datetime import datetime, timedelta, timezone
 
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, UserMixin, login_user
 from flask_login import login_required, logout_user, current_user
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import PyMongoError
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
 import requests
@@ -37,11 +39,17 @@ client = MongoClient(mongo_uri)
 
 db = client.genre_detector
 users_collection = db.users
+rollups_collection = db.genre_rollups
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
 ML_CLIENT_URL = os.getenv("ML_CLIENT_URL")
+STATS_WINDOWS = (7, 30)
+RECENT_WEIGHT = 0.5
+# Daily rollups are only read for the last few days of the longest window,
+# so older ones are expired by MongoDB. Weekly rollups are kept.
+DAILY_ROLLUP_RETENTION = timedelta(days=max(STATS_WINDOWS) + 7)
 
 class User(UserMixin):
     """
@@ -93,12 +101,26 @@ def home():
                 - "Title": The song title.
                 - "Artist": The artist's name.
                 - "Genre": The genre of the song.
+            - window_stats: A dictionary mapping each window length in days to the
+              genre statistics for that window, in the same format as genres.
+            - trending: A list of genres with their weekly change, see get_trending().
     """
     cur_user = current_user.username
     cur_user_collection = db[cur_user]
+    now = datetime.now(timezone.utc)
     genres = get_stats(cur_user_collection)
-    recommendations = get_recommendations(genres)
-    return render_template("home.html", genres=genres, recommendations=recommendations)
+    window_stats = {days: get_window_stats(cur_user, days, now) for days in STATS_WINDOWS}
+    trending = get_trending(cur_user, now)
+    recommendations = get_recommendations(
+        blend_genres(genres, window_stats[STATS_WINDOWS[-1]])
+    )
+    return render_template(
+        "home.html",
+        genres=genres,
+        recommendations=recommendations,
+        window_stats=window_stats,
+        trending=trending,
+    )
 
 
 def get_stats(cur_user_collection):
@@ -119,20 +141,212 @@ def get_stats(cur_user_collection):
 
     pipeline = [{"$group": {"_id": "$genre", "count": {"$sum": 1}}}]
     genre_counts = list(cur_user_collection.aggregate(pipeline))
-    total_songs = sum(item["count"] for item in genre_counts)
+    return format_stats({item["_id"]: item["count"] for item in genre_counts})
+
+
+def format_stats(counts):
+    """
+    Formats a mapping of genre counts as genre statistics.
+
+    Args:
+        counts (dict): A dictionary mapping genre names to song counts.
+
+    Returns:
+        list: A list of dictionaries in the format returned by get_stats().
+    """
+    total_songs = sum(counts.values())
 
     result = [
         {
-            "Name": item["_id"],
-            "Amount": item["count"],
-            "Percentage": f"{(item['count'] / total_songs) * 100:.2f}%",
+            "Name": genre,
+            "Amount": count,
+            "Percentage": f"{(count / total_songs) * 100:.2f}%",
         }
-        for item in genre_counts
+        for genre, count in counts.items()
+        if count > 0
     ]
 
     return result
 
 
+def period_start(moment, period):
+    """
+    Computes the start of the daily or weekly rollup bucket containing a moment.
+
+    Args:
+        moment (datetime): A timezone-aware UTC datetime.
+        period (str): Either "day" or "week". Weeks start on Monday.
+
+    Returns:
+        datetime: Midnight UTC at the start of the bucket.
+    """
+    start = moment.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if period == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def update_rollups(username, genre, moment):
+    """
+    Incrementally updates the user's daily and weekly genre rollups for one upload.
+
+    Each rollup document holds the genre counts of one user for one day or week,
+    so windowed statistics only read a handful of documents instead of scanning
+    the full upload history.
+
+    Args:
+        username (str): The user who uploaded the song.
+        genre (str): The genre of the uploaded song.
+        moment (datetime): When the song was uploaded.
+
+    Returns:
+        None
+    """
+    for period in ("day", "week"):
+        rollups_collection.update_one(
+            {"user": username, "period": period, "start": period_start(moment, period)},
+            {"$inc": {f"counts.{genre}": 1}},
+            upsert=True,
+        )
+
+
+def create_rollup_indexes():
+    """
+    Creates the index used to look up a user's rollups by period and start date,
+    and a TTL index that removes daily rollups older than DAILY_ROLLUP_RETENTION.
+
+    Returns:
+        None
+    """
+    rollups_collection.create_index(
+        [("user", ASCENDING), ("period", ASCENDING), ("start", ASCENDING)],
+        unique=True,
+    )
+    rollups_collection.create_index(
+        [("start", ASCENDING)],
+        name="daily_rollup_ttl",
+        expireAfterSeconds=int(DAILY_ROLLUP_RETENTION.total_seconds()),
+        partialFilterExpression={"period": "day"},
+    )
+
+
+def sum_rollups(username, period, since, until=None):
+    """
+    Sums the genre counts of a user's rollups within a date range.
+
+    Args:
+        username (str): The user whose rollups are summed.
+        period (str): Either "day" or "week".
+        since (datetime): Start of the first bucket to include.
+        until (datetime, optional): Start of the first bucket to exclude.
+
+    Returns:
+        dict: A dictionary mapping genre names to song counts.
+    """
+    start_filter = {"$gte": since}
+    if until is not None:
+        start_filter["$lt"] = until
+    counts = {}
+    for rollup in rollups_collection.find(
+        {"user": username, "period": period, "start": start_filter}
+    ):
+        for genre, count in rollup.get("counts", {}).items():
+            counts[genre] = counts.get(genre, 0) + count
+    return counts
+
+
+def get_window_stats(username, days, now):
+    """
+    Computes the genre statistics for the user's uploads in the last few days.
+
+    Whole weeks are read from the weekly rollups and the remaining days before the
+    first Monday in the window from the daily rollups, so a window of N days reads
+    at most 6 daily and N // 7 + 1 weekly documents, regardless of how many songs
+    the user has uploaded in total.
+
+    Args:
+        username (str): The current user's username.
+        days (int): Length of the window in days, including today.
+        now (datetime): The current time.
+
+    Returns:
+        list: A list of dictionaries in the format returned by get_stats().
+    """
+    since = period_start(now, "day") - timedelta(days=days - 1)
+    weeks_from = since + timedelta(days=-since.weekday() % 7)
+    counts = sum_rollups(username, "week", weeks_from)
+    if since < weeks_from:
+        for genre, count in sum_rollups(username, "day", since, weeks_from).items():
+            counts[genre] = counts.get(genre, 0) + count
+    return format_stats(counts)
+
+
+def blend_genres(genres, recent_genres):
+    """
+    Weights the user's recent genres on top of their all-time genre statistics.
+
+    The recent counts are scaled so that they add up to RECENT_WEIGHT times the
+    all-time total, then added to the all-time amounts. Recent listening therefore
+    shifts the recommendations without discarding the user's long-term history.
+
+    Args:
+        genres (list): All-time genre statistics as returned by get_stats().
+        recent_genres (list): Recent genre statistics as returned by get_window_stats().
+
+    Returns:
+        list: A list of dictionaries, each containing:
+            - "Name" (str): The genre name.
+            - "Amount" (float): The blended weight of the genre.
+    """
+    total = sum(genre["Amount"] for genre in genres)
+    recent_total = sum(genre["Amount"] for genre in recent_genres)
+    if recent_total == 0:
+        return genres
+
+    scale = RECENT_WEIGHT * total / recent_total if total else 1
+    amounts = {genre["Name"]: genre["Amount"] for genre in genres}
+    for genre in recent_genres:
+        amounts[genre["Name"]] = amounts.get(genre["Name"], 0) + genre["Amount"] * scale
+
+    return [{"Name": name, "Amount": amount} for name, amount in amounts.items()]
+
+
+def get_trending(username, now):
+    """
+    Compares the user's genre counts this week with last week.
+
+    Args:
+        username (str): The current user's username.
+        now (datetime): The current time.
+
+    Returns:
+        list: A list of dictionaries sorted by change, largest increase first,
+        where each dictionary contains:
+            - "Name" (str): The genre name.
+            - "This Week" (int): The count of songs uploaded this week.
+            - "Last Week" (int): The count of songs uploaded last week.
+            - "Change" (int): This week's count minus last week's count.
+    """
+    this_week = period_start(now, "week")
+    last_week = this_week - timedelta(weeks=1)
+    current = sum_rollups(username, "week", this_week)
+    previous = sum_rollups(username, "week", last_week, this_week)
+
+    result = [
+        {
+            "Name": genre,
+            "This Week": current.get(genre, 0),
+            "Last Week": previous.get(genre, 0),
+            "Change": current.get(genre, 0) - previous.get(genre, 0),
+        }
+        for genre in set(current) | set(previous)
+    ]
+
+    return sorted(result, key=lambda x: (-x["Change"], x["Name"]))
+
+
 def get_recommendations(genres):
     """
     Generates song recommendations based on the user's top genres.
@@ -329,10 +543,19 @@ def upload():
         json={"audio": f"data:audio/wav;base64,{audio_data}"},
         timeout=30
     )
-    genre = response.json()["result"]
+    genre = response.json()["result"].capitalize()
+    uploaded_at = datetime.now(timezone.utc)
+
+    # The rollups are derived stats and are updated first: if this fails the upload
+    # is still saved and only the windowed stats undercount it, which is logged.
+    try:
+        update_rollups(current_user.username, genre, uploaded_at)
+    except PyMongoError:
+        app.logger.exception("Failed to update genre rollups for %s", current_user.username)
 
     cur_user_collection.insert_one({
-        "genre": genre.capitalize()
+        "genre": genre,
+        "uploaded_at": uploaded_at
     })
 
     flash("Upload successful and saved to your collection.")
@@ -341,4 +564,5 @@ def upload():
 
 if __name__ == "__main__":
     add_recommendations()
+    create_rollup_indexes()
     app.run(host="0.0.0.0", port=5002, debug=True)
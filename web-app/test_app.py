@@ -12,10 +12,14 @@ Author:
 """
 # pylint: disable=redefined-outer-name
 import ast
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock, mock_open
 import pytest
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
 from app import app, get_stats, get_recommendations, add_recommendations
+from app import period_start, update_rollups, get_window_stats, get_trending
+from app import blend_genres, create_rollup_indexes
 
 
 SONGS_CONTENT = """[
@@ -120,10 +124,208 @@ def test_home_route_logged_in(
         {"Title": "Song A", "Artist": "Artist 1", "Genre": "rock"},
     ]
 
-    response = flask_client.get("/home")
+    with patch("app.get_window_stats") as mock_get_window_stats, \
+            patch("app.get_trending") as mock_get_trending:
+        mock_get_window_stats.return_value = [
+            {"Name": "jazz", "Amount": 2, "Percentage": "100.00%"},
+        ]
+        mock_get_trending.return_value = [
+            {"Name": "jazz", "This Week": 2, "Last Week": 0, "Change": 2},
+        ]
+
+        response = flask_client.get("/home")
     assert response.status_code == 200
     assert b"rock" in response.data
     assert b"Song A" in response.data
+    assert b"Last 7 Days" in response.data
+    assert b"+2" in response.data
+    mock_get_recommendations.assert_called_once_with([
+        {"Name": "rock", "Amount": 5},
+        {"Name": "jazz", "Amount": 2.5},
+    ])
+
+def test_period_start():
+    """
+    Test that `period_start` truncates to midnight and to Monday for weeks.
+    """
+    moment = datetime(2024, 11, 14, 15, 30, tzinfo=timezone.utc)  # a Thursday
+
+    assert period_start(moment, "day") == datetime(2024, 11, 14, tzinfo=timezone.utc)
+    assert period_start(moment, "week") == datetime(2024, 11, 11, tzinfo=timezone.utc)
+
+@patch("app.rollups_collection")
+def test_update_rollups(mock_rollups):
+    """
+    Test that `update_rollups` increments the daily and weekly rollups with upserts.
+    """
+    moment = datetime(2024, 11, 14, 15, 30, tzinfo=timezone.utc)
+
+    update_rollups("test_user", "Rock", moment)
+
+    mock_rollups.update_one.assert_any_call(
+        {"user": "test_user", "period": "day",
+         "start": datetime(2024, 11, 14, tzinfo=timezone.utc)},
+        {"$inc": {"counts.Rock": 1}},
+        upsert=True,
+    )
+    mock_rollups.update_one.assert_any_call(
+        {"user": "test_user", "period": "week",
+         "start": datetime(2024, 11, 11, tzinfo=timezone.utc)},
+        {"$inc": {"counts.Rock": 1}},
+        upsert=True,
+    )
+    assert mock_rollups.update_one.call_count == 2
+
+@patch("app.rollups_collection")
+def test_create_rollup_indexes(mock_rollups):
+    """
+    Test that daily rollups get a TTL index and weekly rollups are not expired.
+    """
+    create_rollup_indexes()
+
+    mock_rollups.create_index.assert_any_call(
+        [("start", 1)],
+        name="daily_rollup_ttl",
+        expireAfterSeconds=37 * 24 * 60 * 60,
+        partialFilterExpression={"period": "day"},
+    )
+
+@patch("app.rollups_collection")
+def test_get_window_stats(mock_rollups):
+    """
+    Test that `get_window_stats` reads whole weeks from the weekly rollups and
+    the leading days from the daily rollups.
+    """
+    mock_rollups.find.side_effect = [
+        [{"counts": {"Rock": 2, "Pop": 1}}],
+        [{"counts": {"Rock": 1}}],
+    ]
+    now = datetime(2024, 11, 14, 15, 30, tzinfo=timezone.utc)
+
+    stats = get_window_stats("test_user", 7, now)
+
+    assert stats == [
+        {"Name": "Rock", "Amount": 3, "Percentage": "75.00%"},
+        {"Name": "Pop", "Amount": 1, "Percentage": "25.00%"},
+    ]
+    mock_rollups.find.assert_any_call({
+        "user": "test_user",
+        "period": "week",
+        "start": {"$gte": datetime(2024, 11, 11, tzinfo=timezone.utc)},
+    })
+    mock_rollups.find.assert_any_call({
+        "user": "test_user",
+        "period": "day",
+        "start": {
+            "$gte": datetime(2024, 11, 8, tzinfo=timezone.utc),
+            "$lt": datetime(2024, 11, 11, tzinfo=timezone.utc),
+        },
+    })
+
+@patch("app.rollups_collection")
+def test_get_window_stats_whole_weeks(mock_rollups):
+    """
+    Test that a window starting on a Monday reads only the weekly rollups.
+    """
+    mock_rollups.find.return_value = [{"counts": {"Jazz": 4}}]
+    now = datetime(2024, 11, 17, 8, 0, tzinfo=timezone.utc)  # a Sunday
+
+    stats = get_window_stats("test_user", 7, now)
+
+    assert stats == [{"Name": "Jazz", "Amount": 4, "Percentage": "100.00%"}]
+    mock_rollups.find.assert_called_once_with({
+        "user": "test_user",
+        "period": "week",
+        "start": {"$gte": datetime(2024, 11, 11, tzinfo=timezone.utc)},
+    })
+
+def test_blend_genres_keeps_history():
+    """
+    Test that recent genres are weighted in without discarding all-time history.
+    """
+    genres = [{"Name": "Rock", "Amount": 200}, {"Name": "Jazz", "Amount": 1}]
+    recent_genres = [{"Name": "Jazz", "Amount": 1}]
+
+    blended = blend_genres(genres, recent_genres)
+
+    assert blended == [
+        {"Name": "Rock", "Amount": 200},
+        {"Name": "Jazz", "Amount": 101.5},
+    ]
+
+@patch("app.db")
+def test_recommendations_blend_recent_and_all_time(mock_db):
+    """
+    Test that recommendations draw from both the all-time and the recent top genre
+    when they differ.
+    """
+    mock_recommendations = MagicMock()
+    mock_db.recommendations = mock_recommendations
+    mock_recommendations.aggregate.side_effect = [[], []]
+
+    genres = [{"Name": "Rock", "Amount": 200}, {"Name": "Jazz", "Amount": 1}]
+    recent_genres = [{"Name": "Jazz", "Amount": 1}]
+
+    get_recommendations(blend_genres(genres, recent_genres))
+
+    pipelines = [call.args[0] for call in mock_recommendations.aggregate.call_args_list]
+    assert pipelines == [
+        [{"$match": {"genre": "Rock"}}, {"$sample": {"size": 3}}],
+        [{"$match": {"genre": "Jazz"}}, {"$sample": {"size": 2}}],
+    ]
+
+def test_blend_genres_without_recent():
+    """
+    Test that all-time statistics are used unchanged when there are no recent uploads.
+    """
+    genres = [{"Name": "Rock", "Amount": 5, "Percentage": "100.00%"}]
+
+    assert blend_genres(genres, []) is genres
+
+@patch("app.rollups_collection")
+def test_get_trending(mock_rollups):
+    """
+    Test that `get_trending` compares this week's rollup with last week's.
+    """
+    mock_rollups.find.side_effect = [
+        [{"counts": {"Rock": 3, "Jazz": 1}}],
+        [{"counts": {"Rock": 1, "Pop": 2}}],
+    ]
+    now = datetime(2024, 11, 14, 15, 30, tzinfo=timezone.utc)
+
+    trending = get_trending("test_user", now)
+
+    assert trending == [
+        {"Name": "Rock", "This Week": 3, "Last Week": 1, "Change": 2},
+        {"Name": "Jazz", "This Week": 1, "Last Week": 0, "Change": 1},
+        {"Name": "Pop", "This Week": 0, "Last Week": 2, "Change": -2},
+    ]
+
+@patch("app.update_rollups")
+@patch("app.requests.post")
+@patch("app.db")
+@patch("flask_login.utils._get_user")
+def test_upload_stores_timestamp(mock_get_user, mock_db, mock_post, mock_update_rollups,
+                                 flask_client):
+    """
+    Test that an upload is saved with a timestamp and updates the rollups.
+    """
+    mock_get_user.return_value.is_authenticated = True
+    mock_get_user.return_value.username = "test_user"
+    mock_post.return_value.json.return_value = {"result": "rock"}
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+
+    response = flask_client.post(
+        "/upload",
+        data={"recorded_audio": "data:audio/wav;base64,AAAA"},
+    )
+    assert response.status_code == 302
+
+    saved = mock_collection.insert_one.call_args[0][0]
+    assert saved["genre"] == "Rock"
+    assert saved["uploaded_at"].tzinfo == timezone.utc
+    mock_update_rollups.assert_called_once_with("test_user", "Rock", saved["uploaded_at"])
 
 @patch("app.db.create_collection")
 @patch("app.users_collection.find_one")
@@ -213,3 +415,25 @@ def test_add_recommendations(mock_file, mock_db):
 
     mock_recommendations.delete_many.assert_called_once_with({})
     mock_recommendations.insert_many.assert_called_once_with(expected_songs)
+
+@patch("app.update_rollups", side_effect=PyMongoError("rollup write failed"))
+@patch("app.requests.post")
+@patch("app.db")
+@patch("flask_login.utils._get_user")
+def test_upload_rollup_failure(mock_get_user, mock_db, mock_post, _mock_update_rollups,
+                               flask_client):
+    """
+    Test that a failed rollup update is logged and the upload is still saved.
+    """
+    mock_get_user.return_value.is_authenticated = True
+    mock_get_user.return_value.username = "test_user"
+    mock_post.return_value.json.return_value = {"result": "rock"}
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+
+    response = flask_client.post(
+        "/upload",
+        data={"recorded_audio": "data:audio/wav;base64,AAAA"},
+    )
+    assert response.status_code == 302
+    assert mock_collection.insert_one.call_args[0][0]["genre"] == "Rock"